@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-15 08:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_payment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['listing', 'start_date', 'end_date'], name='listings_bo_listing_8c812a_idx'),
+        ),
+    ]
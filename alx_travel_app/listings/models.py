@@ -91,6 +91,8 @@ class Booking(models.Model):
         indexes = [
             models.Index(fields=['listing']),
             models.Index(fields=['guest']),
+            # Availability / overlap lookups filter a listing by date range.
+            models.Index(fields=['listing', 'start_date', 'end_date']),
         ]
         constraints = [
             models.CheckConstraint(
@@ -138,8 +140,16 @@ class Review(models.Model):
 
 
 class Payment(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='payments',
+        blank=True,
+        null=True,
+    )
     booking_reference = models.CharField(max_length=100)
     transaction_id = models.CharField(max_length=100, blank=True, null=True)
+    checkout_url = models.URLField(max_length=500, blank=True, null=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(
         max_length=20,
@@ -157,6 +167,7 @@ class Payment(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['booking_reference']),
+            models.Index(fields=['transaction_id']),
         ]
         constraints = [
             models.CheckConstraint(
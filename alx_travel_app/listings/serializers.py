@@ -2,16 +2,14 @@
 """Serializers for Listing, Booking, and Review models in the travel app."""
 
 from rest_framework import serializers
-from django.db.models import Avg
 from .models import Listing, Booking, Review, Payment
-from drf_spectacular.utils import extend_schema_field
 
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Serializes Review instances for read-only API exposure.
 
     Includes reviewer identity, rating, comment, and timestamp.
-    Used as a nested serializer within ListingSerializer.
+    Used as a nested serializer within ListingDetailSerializer.
     """
 
     user = serializers.StringRelatedField(read_only=True)
@@ -32,7 +30,7 @@ class BookingSerializer(serializers.ModelSerializer):
     """Serializes Booking instances for both read and write operations.
 
     Accepts listing ID for creation, exposes listing and guest names for display.
-    Used as a nested serializer within ListingSerializer.
+    Used as a nested serializer within ListingDetailSerializer.
     """
 
     guest = serializers.StringRelatedField(read_only=True)
@@ -57,17 +55,18 @@ class BookingSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'guest', 'listing', 'created_at']
 
 
-class ListingSerializer(serializers.ModelSerializer):
-    """Serializes Listing instances with nested bookings and reviews.
+class ListingListSerializer(serializers.ModelSerializer):
+    """Serializes Listing instances for collection responses.
 
-    Includes host identity, amenities, availability, and computed average rating.
-    Designed for detailed API responses and frontend consumption.
+    Includes host identity, amenities, availability, and the average rating
+    annotated by ``ListingViewSet.queryset``, but leaves out nested bookings
+    and reviews to keep list payloads small.
     """
 
     host = serializers.StringRelatedField(read_only=True)
-    average_rating = serializers.SerializerMethodField()
-    bookings = BookingSerializer(many=True, read_only=True)
-    reviews = ReviewSerializer(many=True, read_only=True)
+    average_rating = serializers.DecimalField(
+        max_digits=3, decimal_places=2, source='_avg_rating', read_only=True
+    )
 
     class Meta:
         model = Listing
@@ -84,8 +83,6 @@ class ListingSerializer(serializers.ModelSerializer):
             'average_rating',
             'created_at',
             'updated_at',
-            'bookings',
-            'reviews',
         ]
         read_only_fields = [
             'id',
@@ -93,15 +90,25 @@ class ListingSerializer(serializers.ModelSerializer):
             'average_rating',
             'created_at',
             'updated_at',
+        ]
+
+
+class ListingDetailSerializer(ListingListSerializer):
+    """Serializes Listing instances with nested bookings and reviews.
+
+    Designed for detailed API responses and frontend consumption.
+    """
+
+    bookings = BookingSerializer(many=True, read_only=True)
+    reviews = ReviewSerializer(many=True, read_only=True)
+
+    class Meta(ListingListSerializer.Meta):
+        fields = ListingListSerializer.Meta.fields + ['bookings', 'reviews']
+        read_only_fields = ListingListSerializer.Meta.read_only_fields + [
             'bookings',
             'reviews',
         ]
 
-    @extend_schema_field(float)
-    def get_average_rating(self, obj) -> float:
-        """Compute the average rating from all reviews for this listing."""
-        return obj.reviews.aggregate(avg=Avg('rating')).get('avg') or 0.0
-
 
 class PaymentSerializer(serializers.ModelSerializer):
     """Serializer for Payment model."""
@@ -113,6 +120,7 @@ class PaymentSerializer(serializers.ModelSerializer):
             'booking_reference',
             'amount',
             'transaction_id',
+            'checkout_url',
             'status',
             'created_at',
             'updated_at',
@@ -120,7 +128,21 @@ class PaymentSerializer(serializers.ModelSerializer):
         read_only_fields = [
             'id',
             'transaction_id',
+            'checkout_url',
             'status',
             'created_at',
             'updated_at',
         ]
+
+    def validate_booking_reference(self, value):
+        """Allow one live (pending or completed) payment per booking reference."""
+        live = Payment.objects.filter(
+            booking_reference=value, status__in=['Pending', 'Completed']
+        )
+        if self.instance is not None:
+            live = live.exclude(pk=self.instance.pk)
+        if live.exists():
+            raise serializers.ValidationError(
+                'A pending or completed payment already exists for this booking reference.'
+            )
+        return value
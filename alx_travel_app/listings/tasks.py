@@ -1,9 +1,127 @@
+import requests
 from celery import shared_task
-from django.core.mail import send_mail
+from django.conf import settings
+from django.core.mail import get_connection, send_mail, send_mass_mail
+from django.db import transaction
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .models import Payment
+
+# Shared keep-alive session so Chapa calls reuse pooled TCP/TLS connections.
+CHAPA_TIMEOUT = (3.05, 10)
+_chapa = requests.Session()
+_chapa.mount(
+    'https://',
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=50,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+    ),
+)
+
+
+def _chapa_headers():
+    return {"Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"}
+
+
+def _mark_failed(payment_id):
+    """Move a still-pending Payment to Failed so pollers reach a terminal state."""
+    Payment.objects.filter(pk=payment_id, status="Pending").update(
+        status="Failed", updated_at=timezone.now()
+    )
+
+
+BOOKING_CONFIRMATION_SUBJECT = "Booking Confirmation"
+
+
+def _booking_confirmation_message(listing_title):
+    return f"Your booking for {listing_title} has been confirmed!"
+
 
 @shared_task
 def send_booking_confirmation_email(user_email, listing_title):
-    subject = "Booking Confirmation"
-    message = f"Your booking for {listing_title} has been confirmed!"
+    subject = BOOKING_CONFIRMATION_SUBJECT
+    message = _booking_confirmation_message(listing_title)
     send_mail(subject, message, None, [user_email])
     return "Email sent successfully"
+
+
+@shared_task
+def send_booking_confirmation_emails_batch(pairs):
+    """Send confirmations for many ``(user_email, listing_title)`` pairs over one SMTP connection."""
+    messages = [
+        (
+            BOOKING_CONFIRMATION_SUBJECT,
+            _booking_confirmation_message(listing_title),
+            None,
+            [user_email],
+        )
+        for user_email, listing_title in pairs
+    ]
+    sent = send_mass_mail(messages, connection=get_connection())
+    return f"{sent} emails sent successfully"
+
+
+@shared_task
+def initiate_chapa_payment(payment_id):
+    """Start a Chapa transaction for a pending Payment and store its checkout URL."""
+    payment = Payment.objects.get(pk=payment_id)
+    data = {
+        "amount": str(payment.amount),
+        "currency": "ETB",
+        "tx_ref": payment.booking_reference,
+        "return_url": "http://localhost:8000/api/payments/verify/"
+    }
+    try:
+        response = _chapa.post(
+            f"{settings.CHAPA_BASE_URL}/transaction/initialize",
+            headers=_chapa_headers(),
+            data=data,
+            timeout=CHAPA_TIMEOUT,
+        )
+        resp_json = response.json()
+    except (requests.RequestException, ValueError):
+        # Timeouts, exhausted retries and non-JSON error bodies.
+        _mark_failed(payment_id)
+        return {"error": "Payment initiation failed"}
+
+    if resp_json.get("status") == "success":
+        Payment.objects.filter(pk=payment_id).update(
+            transaction_id=resp_json["data"]["tx_ref"],
+            checkout_url=resp_json["data"]["checkout_url"],
+            updated_at=timezone.now(),
+        )
+        return {"checkout_url": resp_json["data"]["checkout_url"]}
+    _mark_failed(payment_id)
+    return {"error": "Payment initiation failed"}
+
+
+@shared_task
+def verify_chapa_payment(payment_id):
+    """Check a Payment's transaction with Chapa and record the outcome on it."""
+    payment = Payment.objects.only("transaction_id").get(pk=payment_id)
+    try:
+        response = _chapa.get(
+            f"{settings.CHAPA_BASE_URL}/transaction/verify/{payment.transaction_id}",
+            headers=_chapa_headers(),
+            timeout=CHAPA_TIMEOUT,
+        )
+        resp_json = response.json()
+    except (requests.RequestException, ValueError):
+        # Timeouts, exhausted retries and non-JSON error bodies.
+        _mark_failed(payment_id)
+        return {"status": "Payment failed"}
+    new_status = "Completed" if resp_json.get("status") == "success" else "Failed"
+
+    # Lock the row so concurrent verifies of one transaction apply in order.
+    with transaction.atomic():
+        Payment.objects.select_for_update().only("pk").get(pk=payment_id)
+        Payment.objects.filter(pk=payment_id).update(
+            status=new_status, updated_at=timezone.now()
+        )
+
+    if new_status == "Completed":
+        return {"status": "Payment successful"}
+    return {"status": "Payment failed"}
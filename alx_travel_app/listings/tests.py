@@ -1,3 +1,268 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core import mail
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import Booking, Listing, Payment
+from .tasks import (
+    BOOKING_CONFIRMATION_SUBJECT,
+    initiate_chapa_payment,
+    send_booking_confirmation_emails_batch,
+    verify_chapa_payment,
+)
+
+User = get_user_model()
+
+
+@mock.patch('alx_travel_app.listings.views.send_booking_confirmation_email')
+class BookingOverlapTests(APITestCase):
+    """A listing cannot hold two active bookings for overlapping dates."""
+
+    def setUp(self):
+        self.guest = User.objects.create_user('guest', 'guest@example.com', 'pw')
+        self.listing = Listing.objects.create(
+            host=User.objects.create_user('host', 'host@example.com', 'pw'),
+            title='Cabin',
+            location='Lake',
+            price_per_night=Decimal('50.00'),
+        )
+        self.booking = Booking.objects.create(
+            listing=self.listing,
+            guest=self.guest,
+            start_date=date(2030, 1, 10),
+            end_date=date(2030, 1, 15),
+            total_price=Decimal('250.00'),
+            status=Booking.STATUS_CONFIRMED,
+        )
+        self.client.force_authenticate(self.guest)
+
+    def _create(self, start, end):
+        return self.client.post(
+            reverse('booking-list'),
+            {
+                'listing_id': self.listing.pk,
+                'start_date': start,
+                'end_date': end,
+                'total_price': '100.00',
+            },
+            format='json',
+        )
+
+    def test_overlapping_booking_is_rejected(self, send_email):
+        response = self._create('2030-01-12', '2030-01-14')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Booking.objects.count(), 1)
+        send_email.delay.assert_not_called()
+
+    def test_booking_starting_on_checkout_day_is_allowed(self, send_email):
+        response = self._create('2030-01-15', '2030-01-18')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        send_email.delay.assert_called_once_with('guest@example.com', 'Cabin')
+
+    def test_cancelled_bookings_do_not_block_dates(self, send_email):
+        self.booking.status = Booking.STATUS_CANCELLED
+        self.booking.save()
+        response = self._create('2030-01-12', '2030-01-14')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_moving_a_booking_over_its_own_dates_is_allowed(self, send_email):
+        response = self.client.patch(
+            reverse('booking-detail', args=[self.booking.pk]),
+            {'start_date': '2030-01-11', 'end_date': '2030-01-16'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_overlapping_booking_can_be_cancelled(self, send_email):
+        other = Booking.objects.create(
+            listing=self.listing,
+            guest=self.guest,
+            start_date=date(2030, 1, 12),
+            end_date=date(2030, 1, 14),
+            total_price=Decimal('100.00'),
+            status=Booking.STATUS_CONFIRMED,
+        )
+        response = self.client.patch(
+            reverse('booking-detail', args=[other.pk]),
+            {'status': Booking.STATUS_CANCELLED},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        other.refresh_from_db()
+        self.assertEqual(other.status, Booking.STATUS_CANCELLED)
+
+
+@mock.patch('alx_travel_app.listings.views.initiate_chapa_payment')
+@mock.patch('alx_travel_app.listings.views.verify_chapa_payment')
+class PaymentViewTests(APITestCase):
+    """Payments are queued for the Chapa tasks and only visible to their owner."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('payer', 'payer@example.com', 'pw')
+        self.other = User.objects.create_user('other', 'other@example.com', 'pw')
+        self.other_payment = Payment.objects.create(
+            user=self.other,
+            booking_reference='REF-OTHER',
+            transaction_id='REF-OTHER',
+            amount=Decimal('80.00'),
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_initiate_creates_pending_payment_for_caller(self, verify_task, initiate_task):
+        response = self.client.post(
+            reverse('payment-initiate'),
+            {'booking_reference': 'REF-1', 'amount': '120.00'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        payment = Payment.objects.get(pk=response.data['payment_id'])
+        self.assertEqual(payment.user, self.user)
+        self.assertEqual(payment.status, 'Pending')
+        self.assertEqual(payment.transaction_id, 'REF-1')
+        self.assertTrue(
+            response.data['status_url'].endswith(
+                reverse('payment-detail', args=[payment.pk])
+            )
+        )
+        initiate_task.delay.assert_called_once_with(payment.pk)
+
+    def test_initiate_rejects_duplicate_booking_reference(self, verify_task, initiate_task):
+        response = self.client.post(
+            reverse('payment-initiate'),
+            {'booking_reference': 'REF-OTHER', 'amount': '80.00'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        initiate_task.delay.assert_not_called()
+
+    def test_verify_other_users_transaction_is_not_found(self, verify_task, initiate_task):
+        response = self.client.get(reverse('payment-verify'), {'tx_ref': 'REF-OTHER'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        verify_task.delay.assert_not_called()
+
+    def test_verify_queues_callers_payment(self, verify_task, initiate_task):
+        payment = Payment.objects.create(
+            user=self.user,
+            booking_reference='REF-2',
+            transaction_id='REF-2',
+            amount=Decimal('60.00'),
+        )
+        response = self.client.get(reverse('payment-verify'), {'tx_ref': 'REF-2'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['payment_id'], payment.pk)
+        verify_task.delay.assert_called_once_with(payment.pk)
+
+    def test_non_staff_only_list_their_own_payments(self, verify_task, initiate_task):
+        own = Payment.objects.create(
+            user=self.user, booking_reference='REF-3', amount=Decimal('10.00')
+        )
+        response = self.client.get(reverse('payment-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data['results']], [own.pk])
+        response = self.client.get(reverse('payment-detail', args=[self.other_payment.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@mock.patch('alx_travel_app.listings.tasks._chapa')
+class ChapaTaskTests(TestCase):
+    """The Chapa tasks always leave the Payment row in its final state."""
+
+    def setUp(self):
+        self.payment = Payment.objects.create(
+            booking_reference='REF-1',
+            transaction_id='REF-1',
+            amount=Decimal('120.00'),
+        )
+
+    def _respond(self, chapa, method, body):
+        getattr(chapa, method).return_value.json.return_value = body
+
+    def test_initiate_success_stores_checkout_url(self, chapa):
+        self._respond(chapa, 'post', {
+            'status': 'success',
+            'data': {'tx_ref': 'TX-1', 'checkout_url': 'https://checkout.chapa.co/TX-1'},
+        })
+        initiate_chapa_payment(self.payment.pk)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.checkout_url, 'https://checkout.chapa.co/TX-1')
+        self.assertEqual(self.payment.transaction_id, 'TX-1')
+        self.assertEqual(self.payment.status, 'Pending')
+
+    def test_initiate_rejection_marks_failed(self, chapa):
+        self._respond(chapa, 'post', {'status': 'failed', 'message': 'Invalid amount'})
+        initiate_chapa_payment(self.payment.pk)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Failed')
+        self.assertIsNone(self.payment.checkout_url)
+
+    def test_initiate_request_errors_mark_failed(self, chapa):
+        for error in (requests.Timeout(), requests.exceptions.RetryError()):
+            with self.subTest(error=type(error).__name__):
+                Payment.objects.filter(pk=self.payment.pk).update(status='Pending')
+                chapa.post.side_effect = error
+                initiate_chapa_payment(self.payment.pk)
+                self.payment.refresh_from_db()
+                self.assertEqual(self.payment.status, 'Failed')
+
+    def test_initiate_non_json_body_marks_failed(self, chapa):
+        chapa.post.return_value.json.side_effect = ValueError('not JSON')
+        initiate_chapa_payment(self.payment.pk)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Failed')
+
+    def test_verify_success_marks_completed(self, chapa):
+        self._respond(chapa, 'get', {'status': 'success'})
+        verify_chapa_payment(self.payment.pk)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Completed')
+
+    def test_verify_rejection_marks_failed(self, chapa):
+        self._respond(chapa, 'get', {'status': 'failed'})
+        verify_chapa_payment(self.payment.pk)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Failed')
+
+    def test_verify_request_errors_mark_failed(self, chapa):
+        for error in (requests.Timeout(), requests.exceptions.RetryError()):
+            with self.subTest(error=type(error).__name__):
+                Payment.objects.filter(pk=self.payment.pk).update(status='Pending')
+                chapa.get.side_effect = error
+                verify_chapa_payment(self.payment.pk)
+                self.payment.refresh_from_db()
+                self.assertEqual(self.payment.status, 'Failed')
+
+    def test_verify_non_json_body_marks_failed(self, chapa):
+        chapa.get.return_value.json.side_effect = ValueError('not JSON')
+        verify_chapa_payment(self.payment.pk)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Failed')
+
+    def test_verify_error_does_not_downgrade_completed_payment(self, chapa):
+        Payment.objects.filter(pk=self.payment.pk).update(status='Completed')
+        chapa.get.side_effect = requests.Timeout()
+        verify_chapa_payment(self.payment.pk)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'Completed')
+
+
+class BookingConfirmationBatchTests(TestCase):
+    """One confirmation is sent per (email, listing title) pair."""
 
-# Create your tests here.
+    def test_sends_one_message_per_pair(self):
+        pairs = [('a@example.com', 'Cabin'), ('b@example.com', 'Loft')]
+        result = send_booking_confirmation_emails_batch(pairs)
+        self.assertEqual(result, '2 emails sent successfully')
+        self.assertEqual(len(mail.outbox), 2)
+        for message, (email, title) in zip(mail.outbox, pairs):
+            self.assertEqual(message.to, [email])
+            self.assertEqual(message.subject, BOOKING_CONFIRMATION_SUBJECT)
+            self.assertEqual(
+                message.body, f'Your booking for {title} has been confirmed!'
+            )
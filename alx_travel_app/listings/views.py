@@ -1,16 +1,31 @@
 #!/usr/bin/env python3
 """ViewSets for Listing, Booking, Review, and Payment endpoints with schema annotations."""
 
-import requests
-from django.conf import settings
-from rest_framework import viewsets, permissions
+from django.db import transaction
+from django.db.models import Avg, FloatField, Value
+from django.db.models.functions import Coalesce
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_page
+from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from drf_spectacular.utils import extend_schema, extend_schema_view
-from .tasks import send_booking_confirmation_email
+from .tasks import (
+    initiate_chapa_payment,
+    send_booking_confirmation_email,
+    verify_chapa_payment,
+)
 
 from .models import Listing, Booking, Review, Payment
-from .serializers import ListingSerializer, BookingSerializer, ReviewSerializer, PaymentSerializer
+from .serializers import (
+    ListingListSerializer,
+    ListingDetailSerializer,
+    BookingSerializer,
+    ReviewSerializer,
+    PaymentSerializer,
+)
 
 # -----------------------------
 # Custom permission for Listings
@@ -30,7 +45,7 @@ class IsHostOrReadOnly(permissions.BasePermission):
 @extend_schema_view(
     list=extend_schema(
         summary='List all listings',
-        description='Retrieve a list of all available property listings, including nested bookings and reviews.',
+        description='Retrieve a list of all available property listings with their average rating. Responses are cached briefly.',
     ),
     retrieve=extend_schema(
         summary='Retrieve a specific listing',
@@ -52,12 +67,39 @@ class IsHostOrReadOnly(permissions.BasePermission):
 class ListingViewSet(viewsets.ModelViewSet):
     """Handles CRUD operations for property listings."""
 
-    queryset = Listing.objects.select_related('host').all()
-    serializer_class = ListingSerializer
+    # The aggregate makes this a GROUP BY query, which drops Meta.ordering.
+    queryset = (
+        Listing.objects.select_related('host')
+        .annotate(
+            _avg_rating=Coalesce(
+                Avg('reviews__rating'), Value(0.0), output_field=FloatField()
+            )
+        )
+        .order_by('-created_at')
+    )
+    serializer_class = ListingDetailSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsHostOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset
+        return queryset.prefetch_related('bookings__guest', 'reviews__user')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ListingListSerializer
+        return ListingDetailSerializer
+
+    # Listings change slowly relative to reads; cache_page keys on the full URL.
+    @method_decorator(cache_page(30))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        serializer.save(host=self.request.user)
+        listing = serializer.save(host=self.request.user)
+        # New listings skip the annotated queryset and have no reviews yet.
+        listing._avg_rating = 0.0
 
 
 # -----------------------------
@@ -80,21 +122,83 @@ class ListingViewSet(viewsets.ModelViewSet):
 class BookingViewSet(viewsets.ModelViewSet):
     """Handles bookings for listings."""
 
-    queryset = Booking.objects.select_related('guest', 'listing__host').all()
+    queryset = Booking.objects.select_related('guest', 'listing').all()
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset.none()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(guest=self.request.user)
+        # Only the columns BookingSerializer renders (listing/guest via __str__).
+        return queryset.only(
+            'id',
+            'start_date',
+            'end_date',
+            'total_price',
+            'status',
+            'created_at',
+            'listing__title',
+            'listing__location',
+            'guest__username',
+        )
+
     def perform_create(self, serializer):
-        serializer.save(guest=self.request.user)
-        
-        # Trigger Celery task 
-        send_booking_confirmation_email.delay(user_email, listing_title)
+        booking = self._save_without_overlap(serializer, guest=self.request.user)
+
+        # Trigger Celery task
+        send_booking_confirmation_email.delay(booking.guest.email, booking.listing.title)
+
+    def perform_update(self, serializer):
+        self._save_without_overlap(serializer)
+
+    def _save_without_overlap(self, serializer, **kwargs):
+        """Save the booking unless it overlaps another active booking of the listing.
+
+        The listing row is locked for the duration of the check so concurrent
+        requests for the same listing cannot both pass it; the lookup is served
+        by the (listing, start_date, end_date) index. Cancelled bookings, and
+        active bookings whose listing and dates are unchanged, skip the check.
+        """
+        data = serializer.validated_data
+        instance = serializer.instance
+        listing = data.get('listing') or instance.listing
+        start_date = data.get('start_date') or instance.start_date
+        end_date = data.get('end_date') or instance.end_date
+        new_status = data.get(
+            'status', instance.status if instance else Booking.STATUS_PENDING
+        )
+
+        if new_status == Booking.STATUS_CANCELLED:
+            return serializer.save(**kwargs)
+        if (
+            instance is not None
+            and instance.status != Booking.STATUS_CANCELLED
+            and (listing.pk, start_date, end_date)
+            == (instance.listing_id, instance.start_date, instance.end_date)
+        ):
+            return serializer.save(**kwargs)
+
+        with transaction.atomic():
+            Listing.objects.select_for_update().only('pk').get(pk=listing.pk)
+            overlapping = Booking.objects.filter(
+                listing=listing, start_date__lt=end_date, end_date__gt=start_date
+            ).exclude(status=Booking.STATUS_CANCELLED)
+            if instance is not None:
+                overlapping = overlapping.exclude(pk=instance.pk)
+            if overlapping.exists():
+                raise ValidationError(
+                    {'non_field_errors': ['Listing is already booked for these dates.']}
+                )
+            return serializer.save(**kwargs)
 
 
 @extend_schema_view(
     list=extend_schema(
         summary='List all reviews',
-        description='Retrieve all reviews left by users across listings.',
+        description='Retrieve reviews left by users. Admins may see all; users see their own.',
     ),
     retrieve=extend_schema(
         summary='Retrieve a specific review',
@@ -108,10 +212,20 @@ class BookingViewSet(viewsets.ModelViewSet):
 class ReviewViewSet(viewsets.ModelViewSet):
     """Handles reviews for listings."""
 
-    queryset = Review.objects.select_related('user', 'listing').all()
+    queryset = Review.objects.select_related('user').all()
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset.none()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset.only(
+            'id', 'listing', 'rating', 'comment', 'created_at', 'user__username'
+        )
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -119,75 +233,75 @@ class ReviewViewSet(viewsets.ModelViewSet):
 # -----------------------------
 # Payment ViewSet
 # -----------------------------
+PAYMENT_ACCEPTED_SCHEMA = {
+    "type": "object",
+    "properties": {"payment_id": {"type": "integer"}, "status_url": {"type": "string"}},
+}
+
+
 class PaymentViewSet(viewsets.ModelViewSet):
-    """Handles payment operations with Chapa integration."""
+    """Handles payment operations with Chapa integration.
+
+    Chapa round-trips run in Celery workers, which write the outcome
+    (``checkout_url``, ``status``) onto the Payment row. ``initiate`` and
+    ``verify`` answer ``202 Accepted`` with the payment's detail URL to poll.
+    Users only ever see their own payments.
+    """
 
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset.none()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def _accepted(self, request, payment):
+        status_url = reverse("payment-detail", kwargs={"pk": payment.pk}, request=request)
+        return Response(
+            {"payment_id": payment.pk, "status_url": status_url},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
     @extend_schema(
         summary="Initiate a payment",
-        description="Start a payment transaction with Chapa. Returns a checkout URL.",
-        responses={200: {"type": "object", "properties": {"checkout_url": {"type": "string"}}}},
+        description="Record a pending payment and queue the Chapa transaction. Poll the status URL for the checkout URL.",
+        request=PaymentSerializer,
+        responses={202: PAYMENT_ACCEPTED_SCHEMA},
     )
     @action(detail=False, methods=["post"], url_path="initiate")
     def initiate(self, request):
-        booking_ref = request.data.get("booking_reference")
-        amount = request.data.get("amount")
-
-        headers = {"Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"}
-        data = {
-            "amount": amount,
-            "currency": "ETB",
-            "tx_ref": booking_ref,
-            "return_url": "http://localhost:8000/api/payments/verify/"
-        }
-
-        response = requests.post(
-            f"{settings.CHAPA_BASE_URL}/transaction/initialize",
-            headers=headers,
-            data=data
-        )
-        resp_json = response.json()
-
-        if resp_json.get("status") == "success":
-            transaction_id = resp_json["data"]["tx_ref"]
-            Payment.objects.create(
-                booking_reference=booking_ref,
-                amount=amount,
-                transaction_id=transaction_id,
-                status="Pending"
-            )
-            return Response({"checkout_url": resp_json["data"]["checkout_url"]})
-        return Response({"error": "Payment initiation failed"}, status=400)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        booking_ref = serializer.validated_data["booking_reference"]
+        payment = serializer.save(user=request.user, transaction_id=booking_ref)
+        initiate_chapa_payment.delay(payment.pk)
+        return self._accepted(request, payment)
 
     @extend_schema(
         summary="Verify a payment",
-        description="Verify the status of a payment transaction with Chapa.",
-        responses={200: {"type": "object", "properties": {"status": {"type": "string"}}}},
+        description="Queue verification of one of your Chapa transactions. Poll the status URL for the outcome.",
+        responses={202: PAYMENT_ACCEPTED_SCHEMA},
     )
     @action(detail=False, methods=["get"], url_path="verify")
     def verify(self, request):
         tx_ref = request.query_params.get("tx_ref")
-        headers = {"Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"}
-        response = requests.get(
-            f"{settings.CHAPA_BASE_URL}/transaction/verify/{tx_ref}",
-            headers=headers
+        # The newest of the caller's payments for this transaction; the task
+        # is handed the same row by primary key.
+        payment = (
+            self.get_queryset()
+            .filter(transaction_id=tx_ref)
+            .order_by("-created_at")
+            .first()
         )
-        resp_json = response.json()
-
-        try:
-            payment = Payment.objects.get(transaction_id=tx_ref)
-            if resp_json.get("status") == "success":
-                payment.status = "Completed"
-                payment.save()
-                return Response({"status": "Payment successful"})
-            else:
-                payment.status = "Failed"
-                payment.save()
-                return Response({"status": "Payment failed"})
-        except Payment.DoesNotExist:
-            return Response({"error": "Transaction not found"}, status=404)
-        except Exception as e:
-            return Response({"error": str(e)}, status=500)
\ No newline at end of file
+        if payment is None:
+            raise NotFound("Transaction not found")
+        verify_chapa_payment.delay(payment.pk)
+        return self._accepted(request, payment)